@@ -1,45 +1,150 @@
+import asyncio
+import concurrent.futures
 import datetime
+import logging
 import os
-import pickle
-import json
 import base64
-from typing import Any, List, Dict, Tuple
+import threading
+from itertools import islice
+from typing import Any, List, Dict, Optional, Tuple
 
+import numpy as np
+import orjson
+import pandas as pd
 import streamlit as st
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from plyer import notification
+
+logger = logging.getLogger(__name__)
+
+# Custom CSS for Neon Dark Mode vibe
+CSS = """
+    <style>
+        body, .main {
+            background-color: #121212;
+            color: #e0e0e0;
+        }
+        h1, h2, h3 {
+            color: #03a9f4; /* Neon Blue */
+            text-align: center;
+        }
+        .stButton button, .stFormSubmitButton button {
+            background: linear-gradient(45deg, #39ff14, #bf00ff); /* Neon Green to Neon Purple */
+            color: #ffffff;
+            font-size: 16px;
+            border: none;
+            padding: 10px 20px;
+            border-radius: 5px;
+            transition: transform 0.2s;
+        }
+        .stButton button:hover, .stFormSubmitButton button:hover {
+            transform: scale(1.05);
+        }
+        .stCheckbox div {
+            font-size: 16px;
+        }
+        .inline-container {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            gap: 10px;
+        }
+        .inline-container img {
+            height: 50px;
+        }
+    </style>
+"""
+
+# Task priority categories, in scheduling order.
+CATEGORIES = ("Urgent", "Important", "Nice-to-Have")
+
+# Google's batch endpoint accepts at most 50 calls per request.
+BATCH_LIMIT = 50
+
+# Batch POST statuses meaning batching is unavailable or the server failed
+# transiently; auth, quota and rate-limit rejections are not retried.
+BATCH_FALLBACK_STATUSES = (400, 404)
+
+# Worker threads used when requests have to be sent individually.
+CALENDAR_WORKERS = 8
+
+# googleapiclient HTTP objects are not thread-safe, so each worker keeps its own.
+_thread_http = threading.local()
+
+
+def file_mtime(path: str) -> float:
+    """
+    Return a file's modification time, for use as part of a cache key.
+    
+    Args:
+        path: Path to the file.
+    
+    Returns:
+        The modification time, or 0.0 if the file does not exist.
+    """
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
 
 
-def get_base64_image(image_path: str) -> str:
+@st.cache_data(show_spinner=False)
+def get_base64_image(image_path: str, mtime: float) -> str:
     """
     Convert an image file to a base64 encoded string.
     
     Args:
         image_path: Path to the image file.
+        mtime: The file's modification time; only used as part of the
+            cache key so edits to the file invalidate it.
     
     Returns:
         Base64 encoded string of the image.
     """
-    if not os.path.exists(image_path):
+    try:
+        with open(image_path, "rb") as image_file:
+            return base64.b64encode(image_file.read()).decode()
+    except FileNotFoundError:
         return ""
-    with open(image_path, "rb") as image_file:
-        encoded = base64.b64encode(image_file.read()).decode()
-    return encoded
 
 
+@st.cache_data(show_spinner=False)
+def get_logo_html(image_path: str, mtime: float) -> str:
+    """
+    Build the inline <img> tag for the logo.
+    
+    Args:
+        image_path: Path to the logo image file.
+        mtime: The file's modification time; only used as part of the
+            cache key so edits to the file invalidate it.
+    
+    Returns:
+        An HTML snippet embedding the logo, or a placeholder if it is missing.
+    """
+    logo_base64 = get_base64_image(image_path, mtime)
+    if logo_base64:
+        return f"<img src='data:image/png;base64,{logo_base64}' alt='Logo'>"
+    return "<div>Logo not found</div>"
+
+
+@st.cache_resource(show_spinner=False)
 def authenticate_google_calendar() -> Any:
     """
     Authenticate with Google Calendar using OAuth credentials.
-    Returns the authenticated Calendar API service.
+    Returns the authenticated Calendar API service, built once and
+    reused across reruns (call authenticate_google_calendar.clear() to reset).
     """
+    # Imported here so the Google client libraries only load when sync is enabled.
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+
     SCOPES = ['https://www.googleapis.com/auth/calendar']
     creds = None
 
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
-            creds = pickle.load(token)
+    try:
+        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+    except FileNotFoundError:
+        pass
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
@@ -47,82 +152,336 @@ def authenticate_google_calendar() -> Any:
         else:
             flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
             creds = flow.run_local_server(port=0)
-        with open('token.pickle', 'wb') as token:
-            pickle.dump(creds, token)
+        # Write to a temporary file and swap it in so a crash never leaves a truncated token.
+        with open('token.json.tmp', 'w') as token:
+            token.write(creds.to_json())
+        os.replace('token.json.tmp', 'token.json')
 
     return build('calendar', 'v3', credentials=creds)
 
 
-def add_to_calendar(service: Any, task: str, start_time: datetime.datetime, duration: int = 45) -> None:
+def add_to_calendar(service: Any, task: str, start_time: datetime.datetime, duration: int = 45) -> Any:
     """
-    Create an event in the Google Calendar.
+    Prepare an insert request for an event in the Google Calendar.
     
     Args:
         service: Authenticated Google Calendar service.
         task: The task title.
         start_time: The start time for the event.
         duration: Duration of the event in minutes.
+    
+    Returns:
+        The unexecuted insert request, to be added to a batch.
     """
     event = {
         'summary': task,
         'start': {'dateTime': start_time.isoformat(), 'timeZone': 'UTC'},
         'end': {'dateTime': (start_time + datetime.timedelta(minutes=duration)).isoformat(), 'timeZone': 'UTC'},
     }
-    service.events().insert(calendarId='primary', body=event).execute()
+    return service.events().insert(calendarId='primary', body=event)
+
+
+@st.cache_resource(show_spinner=False)
+def get_calendar_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    Create the thread pool used to send Calendar requests individually.
+    Cached so every rerun shares the same workers.
+    
+    Returns:
+        The shared thread pool.
+    """
+    return concurrent.futures.ThreadPoolExecutor(max_workers=CALENDAR_WORKERS)
+
+
+def _execute_with_thread_http(request: Any) -> Any:
+    """
+    Execute an API request on this worker thread's own authorized HTTP object.
+    
+    The HTTP object is rebuilt whenever the request carries different
+    credentials, e.g. after re-authentication.
+    
+    Args:
+        request: An unexecuted API request.
+    
+    Returns:
+        The API response.
+    """
+    import google_auth_httplib2
+    import httplib2
+
+    credentials = request.http.credentials
+    if getattr(_thread_http, "credentials", None) is not credentials:
+        _thread_http.credentials = credentials
+        _thread_http.http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+    return request.execute(http=_thread_http.http)
+
+
+def execute_in_parallel(requests: List[Any]) -> List[BaseException]:
+    """
+    Execute API requests concurrently, one HTTP connection per worker thread.
+    
+    Args:
+        requests: Unexecuted API requests.
+    
+    Returns:
+        The errors raised by failed requests, once every request has finished.
+    """
+    pool = get_calendar_pool()
+    futures = [pool.submit(_execute_with_thread_http, request) for request in requests]
+    concurrent.futures.wait(futures)
+    return [future.exception() for future in futures if future.exception() is not None]
+
+
+def execute_in_batches(service: Any, requests: List[Any]) -> None:
+    """
+    Execute API requests through the batch endpoint, BATCH_LIMIT at a time.
+    Falls back to execute_in_parallel when batching is unavailable: a
+    malformed batch response, or a batch POST rejected with a 5xx status
+    or one of BATCH_FALLBACK_STATUSES. None of the batch's calls were
+    applied in those cases. Other rejections (e.g. 401, 403, 429) are
+    re-raised rather than repeated call by call.
+    
+    Args:
+        service: Authenticated Google Calendar service.
+        requests: Unexecuted API requests.
+    
+    Raises:
+        Exception: The first per-request error, from a batch or from the
+            parallel fallback, after every batch has been sent.
+    """
+    from googleapiclient.errors import BatchError, HttpError
+
+    errors: List[BaseException] = []
+
+    def collect_error(request_id: str, response: Any, exception: Optional[BaseException]) -> None:
+        if exception is not None:
+            errors.append(exception)
+
+    pending = iter(requests)
+    while True:
+        chunk = list(islice(pending, BATCH_LIMIT))
+        if not chunk:
+            break
+        batch = service.new_batch_http_request(callback=collect_error)
+        for request in chunk:
+            batch.add(request)
+        try:
+            batch.execute()
+        except BatchError:
+            errors.extend(execute_in_parallel(chunk))
+        except HttpError as error:
+            status = error.resp.status
+            if status < 500 and status not in BATCH_FALLBACK_STATUSES:
+                raise
+            errors.extend(execute_in_parallel(chunk))
+
+    if errors:
+        raise errors[0]
+
+
+@st.cache_resource(show_spinner=False)
+def get_notification_loop() -> asyncio.AbstractEventLoop:
+    """
+    Start the background event loop used to dispatch notifications.
+    Cached so a single loop and daemon thread serve every rerun.
+    
+    Returns:
+        The running event loop.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
 
 
-def send_notification(task: str, time: str) -> None:
+async def _notify_async(task: str, time: str) -> None:
     """
-    Send a desktop notification for the upcoming task.
+    Show a desktop notification on a worker thread.
     
     Args:
         task: The task title.
         time: The scheduled time as a formatted string.
     """
-    notification.notify(
+    from plyer import notification
+
+    await asyncio.to_thread(
+        notification.notify,
         title="Upcoming Task Reminder",
         message=f"Task: {task} at {time}",
         timeout=10
     )
 
 
-def save_schedule(schedule: List[Tuple[str, str]], filename: str = "schedule_history.json") -> None:
+def _log_notification_error(future: concurrent.futures.Future) -> None:
     """
-    Save the daily schedule to a JSON file.
+    Log the error of a failed notification, since nothing waits on it.
     
     Args:
-        schedule: A list of tuples (time_str, task).
-        filename: The JSON file name to store schedule history.
+        future: The completed notification future.
+    """
+    if future.cancelled():
+        return
+    exception = future.exception()
+    if exception is not None:
+        logger.error("Desktop notification failed", exc_info=exception)
+
+
+def send_notification(task: str, time: str) -> concurrent.futures.Future:
+    """
+    Schedule a desktop notification for the upcoming task without blocking.
+    
+    Args:
+        task: The task title.
+        time: The scheduled time as a formatted string.
+    
+    Returns:
+        A future for the dispatched notification.
+    """
+    future = asyncio.run_coroutine_threadsafe(_notify_async(task, time), get_notification_loop())
+    future.add_done_callback(_log_notification_error)
+    return future
+
+
+def migrate_schedule_history(filename: str = "schedule_history.jsonl") -> bool:
     """
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            history = json.load(f)
-    else:
-        history = []
+    Convert a legacy JSON schedule history into the JSON Lines file.
+    
+    Only call this once the JSON Lines file is known to be missing; it is
+    replaced by the converted history. The legacy .json file with the same
+    base name is left in place.
+    
+    Args:
+        filename: The JSON Lines file name where schedule history is stored.
+    
+    Returns:
+        True if a legacy history was converted.
+    """
+    legacy = os.path.splitext(filename)[0] + ".json"
+    if legacy == filename:
+        return False
+    try:
+        with open(legacy, "rb") as f:
+            history = orjson.loads(f.read())
+    except FileNotFoundError:
+        return False
+    tmp = filename + ".tmp"
+    with open(tmp, "wb", buffering=1 << 16) as f:
+        f.write(b"".join(orjson.dumps(entry) + b"\n" for entry in history))
+    os.replace(tmp, filename)
+    return True
+
+
+@st.cache_resource(show_spinner=False)
+def ensure_schedule_history_migrated(filename: str = "schedule_history.jsonl") -> None:
+    """
+    Migrate a legacy history before the first append to `filename`.
+    Cached so the check runs once per file rather than on every save.
+    
+    Args:
+        filename: The JSON Lines file name where schedule history is stored.
+    """
+    if not os.path.exists(filename):
+        migrate_schedule_history(filename)
+
 
-    history.append({
+def save_schedule(schedule: List[Tuple[str, str]], filename: str = "schedule_history.jsonl") -> None:
+    """
+    Append the daily schedule to a JSON Lines file.
+    
+    Args:
+        schedule: A list of tuples (time_str, task).
+        filename: The JSON Lines file name to store schedule history.
+    """
+    entry = {
         "date": datetime.datetime.utcnow().strftime("%Y-%m-%d"),
         "tasks": schedule
-    })
-
-    with open(filename, "w") as f:
-        json.dump(history, f, indent=4)
+    }
+    ensure_schedule_history_migrated(filename)
+    with open(filename, "a+b", buffering=1 << 16) as f:
+        # Terminate a partial line left by an interrupted save so this entry
+        # does not get merged into it.
+        separator = b""
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                separator = b"\n"
+        f.write(separator + orjson.dumps(entry) + b"\n")
+
+
+def _parse_history_lines(lines: List[bytes]) -> List[Dict]:
+    """
+    Parse JSON Lines history entries, skipping lines that are not valid JSON.
+    
+    Args:
+        lines: Raw lines read from the history file.
+    
+    Returns:
+        The parsed entries, in file order.
+    """
+    history = []
+    for line in lines:
+        try:
+            history.append(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            # Blank lines, or a save interrupted mid-append leaving a partial line.
+            continue
+    return history
 
 
-def load_schedule_history(filename: str = "schedule_history.json") -> List[Dict]:
+def load_schedule_history(filename: str = "schedule_history.jsonl", limit: Optional[int] = None) -> List[Dict]:
     """
-    Load the schedule history from a JSON file.
+    Load the schedule history from a JSON Lines file.
     
     Args:
-        filename: The JSON file name where schedule history is stored.
+        filename: The JSON Lines file name where schedule history is stored.
+        limit: If given, only the most recent `limit` entries are read,
+            seeking from the end of the file instead of reading all of it.
     
     Returns:
         The schedule history as a list of dictionaries.
     """
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            return json.load(f)
-    return []
+    try:
+        f = open(filename, "rb")
+    except FileNotFoundError:
+        if not migrate_schedule_history(filename):
+            return []
+        try:
+            f = open(filename, "rb")
+        except FileNotFoundError:
+            return []
+    with f:
+        if limit is None:
+            return _parse_history_lines(f.read().splitlines())
+        if limit <= 0:
+            return []
+        size = f.seek(0, os.SEEK_END)
+        window = 1 << 16
+        while True:
+            start = max(0, size - window)
+            f.seek(start)
+            lines = f.read().splitlines()
+            # The first line may be cut off unless the window reached the start.
+            if start > 0:
+                lines = lines[1:]
+            history = _parse_history_lines(lines)
+            if start == 0 or len(history) >= limit:
+                return history[-limit:]
+            window *= 2
+
+
+def clear_session_state(*keys: str, prefixes: Tuple[str, ...] = ()) -> None:
+    """
+    Remove derived entries from st.session_state so they are rebuilt
+    from their changed inputs.
+    
+    Args:
+        keys: The session state keys to remove.
+        prefixes: Widget key prefixes (e.g. "cat_") whose per-task keys to remove.
+    """
+    for key in keys:
+        st.session_state.pop(key, None)
+    stale_widgets = [key for key in st.session_state if key.startswith(prefixes)]
+    for key in stale_widgets:
+        del st.session_state[key]
 
 
 def brain_dump() -> None:
@@ -135,6 +494,10 @@ def brain_dump() -> None:
         if st.button("Submit Tasks", use_container_width=True):
             tasks = [task.strip() for task in tasks_input.splitlines() if task.strip()]
             st.session_state["tasks"] = tasks
+            clear_session_state(
+                "ordered_task_ids", "schedule", "schedule_df",
+                prefixes=("cat_", "dur_", "done_")
+            )
             st.success("Tasks submitted!")
 
 
@@ -142,56 +505,83 @@ def prioritize_tasks() -> None:
     """
     Display the task prioritization section.
     Categorizes tasks into 'Urgent', 'Important', and 'Nice-to-Have'
-    and saves the results to st.session_state.
+    and saves the resulting scheduling order to st.session_state as
+    "ordered_task_ids": indices into st.session_state["tasks"], so
+    duplicate names stay distinct.
     """
     if "tasks" in st.session_state:
         st.subheader("🎯 Prioritize Your Tasks")
-        categorized_tasks: Dict[str, List[str]] = {"Urgent": [], "Important": [], "Nice-to-Have": []}
-        for task in st.session_state["tasks"]:
-            category = st.radio(
-                f"Categorize: {task}",
-                ["Urgent", "Important", "Nice-to-Have"],
-                key=f"{task}_category",
-                horizontal=True
-            )
-            categorized_tasks[category].append(task)
-        st.session_state["categorized_tasks"] = categorized_tasks
+        categorized_tasks: Dict[str, List[int]] = {category: [] for category in CATEGORIES}
+        with st.form("prioritize"):
+            for idx, task in enumerate(st.session_state["tasks"]):
+                category = st.radio(
+                    f"Categorize: {task}",
+                    CATEGORIES,
+                    key=f"cat_{idx}",
+                    horizontal=True
+                )
+                categorized_tasks[category].append(idx)
+            submitted = st.form_submit_button("Apply", use_container_width=True)
+        if submitted:
+            st.session_state["ordered_task_ids"] = [
+                idx for category in CATEGORIES for idx in categorized_tasks[category]
+            ]
+            clear_session_state("schedule", "schedule_df", prefixes=("done_",))
 
 
 def create_schedule() -> None:
     """
-    Create the daily schedule using the categorized tasks.
+    Create the daily schedule using the prioritized task order.
     Allows syncing with Google Calendar, sends notifications,
     and saves the schedule to st.session_state.
     """
-    if "categorized_tasks" in st.session_state:
+    if "ordered_task_ids" in st.session_state:
         st.subheader("⏳ Create Your Daily Schedule")
-        use_calendar = st.checkbox("Sync with Google Calendar")
-        service = authenticate_google_calendar() if use_calendar else None
-        schedule: List[Tuple[str, str]] = []
-        now = datetime.datetime.utcnow().replace(second=0, microsecond=0)
-        time_slot = now.replace(hour=8, minute=0)
-
-        for category in ["Urgent", "Important", "Nice-to-Have"]:
-            for task in st.session_state["categorized_tasks"][category]:
-                duration = st.slider(
-                    f"Duration (minutes) for '{task}'",
+        tasks = st.session_state["tasks"]
+        ordered_ids = st.session_state["ordered_task_ids"]
+        ordered_tasks = [tasks[idx] for idx in ordered_ids]
+        with st.form("create_schedule"):
+            use_calendar = st.checkbox("Sync with Google Calendar")
+            durations = [
+                st.slider(
+                    f"Duration (minutes) for '{tasks[idx]}'",
                     min_value=15,
                     max_value=120,
                     value=45,
                     step=15,
-                    key=f"{task}_duration"
+                    key=f"dur_{idx}"
                 )
-                time_str = time_slot.strftime("%I:%M %p")
-                schedule.append((time_str, task))
-                if use_calendar and service:
-                    add_to_calendar(service, task, time_slot, duration)
-                reminder_time = time_slot - datetime.timedelta(minutes=5)
-                if reminder_time > datetime.datetime.utcnow():
-                    send_notification(task, time_str)
-                time_slot += datetime.timedelta(minutes=duration)
+                for idx in ordered_ids
+            ]
+            submitted = st.form_submit_button("Create Schedule", use_container_width=True)
+        if not submitted:
+            return
 
+        service = authenticate_google_calendar() if use_calendar else None
+        schedule: List[Tuple[str, str]] = []
+        calendar_requests: List[Any] = []
+        now_utc = datetime.datetime.utcnow()
+        now = now_utc.replace(second=0, microsecond=0)
+        time_slot = now.replace(hour=8, minute=0)
+
+        # Start times are the running sum of the preceding durations.
+        offsets = np.array(durations, dtype="timedelta64[m]")
+        starts = pd.to_datetime(np.datetime64(time_slot, "m") + np.cumsum(offsets) - offsets)
+        time_strs = starts.strftime("%I:%M %p")
+
+        for task, start, time_str, duration in zip(ordered_tasks, starts.to_pydatetime(), time_strs, durations):
+            schedule.append((time_str, task))
+            if use_calendar and service:
+                calendar_requests.append(add_to_calendar(service, task, start, duration))
+            reminder_time = start - datetime.timedelta(minutes=5)
+            if reminder_time > now_utc:
+                send_notification(task, time_str)
+
+        if calendar_requests:
+            execute_in_batches(service, calendar_requests)
         st.session_state["schedule"] = schedule
+        st.session_state["schedule_df"] = pd.DataFrame(schedule, columns=["Time", "Task"])
+        clear_session_state(prefixes=("done_",))
         save_schedule(schedule)
         st.success("✅ Schedule created!")
 
@@ -203,13 +593,15 @@ def review_schedule() -> None:
     """
     if "schedule" in st.session_state:
         st.subheader("📌 Your Optimized Schedule")
-        st.table(st.session_state["schedule"])
+        st.dataframe(st.session_state["schedule_df"], hide_index=True, use_container_width=True)
         st.subheader("🌙 Evening Review")
         completed_tasks = []
-        for time_str, task in st.session_state["schedule"]:
-            if st.checkbox(f"✅ Completed: {task} at {time_str}", key=f"{task}_completed"):
-                completed_tasks.append(task)
-        if st.button("Save Review", use_container_width=True):
+        with st.form("review"):
+            for idx, (time_str, task) in enumerate(st.session_state["schedule"]):
+                if st.checkbox(f"✅ Completed: {task} at {time_str}", key=f"done_{idx}"):
+                    completed_tasks.append(task)
+            submitted = st.form_submit_button("Save Review", use_container_width=True)
+        if submitted:
             st.success("🎯 Review saved!")
 
 
@@ -220,50 +612,10 @@ def day_planner() -> None:
     """
     st.set_page_config(page_title="DayPlanner GPT", page_icon="logo.png", layout="wide")
 
-    # Custom CSS for Neon Dark Mode vibe
-    st.markdown("""
-        <style>
-            body, .main {
-                background-color: #121212;
-                color: #e0e0e0;
-            }
-            h1, h2, h3 {
-                color: #03a9f4; /* Neon Blue */
-                text-align: center;
-            }
-            .stButton button {
-                background: linear-gradient(45deg, #39ff14, #bf00ff); /* Neon Green to Neon Purple */
-                color: #ffffff;
-                font-size: 16px;
-                border: none;
-                padding: 10px 20px;
-                border-radius: 5px;
-                transition: transform 0.2s;
-            }
-            .stButton button:hover {
-                transform: scale(1.05);
-            }
-            .stCheckbox div {
-                font-size: 16px;
-            }
-            .inline-container {
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                gap: 10px;
-            }
-            .inline-container img {
-                height: 50px;
-            }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(CSS, unsafe_allow_html=True)
 
     # Embed the logo image using base64 encoding
-    logo_base64 = get_base64_image("logo.png")
-    if logo_base64:
-        logo_html = f"<img src='data:image/png;base64,{logo_base64}' alt='Logo'>"
-    else:
-        logo_html = "<div>Logo not found</div>"
+    logo_html = get_logo_html("logo.png", file_mtime("logo.png"))
 
     st.markdown(f"""
         <div class='inline-container'>